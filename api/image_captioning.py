@@ -1,10 +1,22 @@
 from fastapi import APIRouter
-from services.image_captioning_service import generate_caption
+from starlette.concurrency import run_in_threadpool
+from services.model_host import get_model_host_client
 from models.request_models import ImageURLRequest
 
+# In multi-worker mode the model host owns the weights; otherwise load them here
+model_host = get_model_host_client()
+if not model_host:
+    from services.image_captioning_service import generate_caption
+
 router = APIRouter()
 
 @router.post("/")
 async def caption_image(request: ImageURLRequest):
     """Generate an image caption from a clothing image."""
-    return await generate_caption(request.image_url)
+    if model_host:
+        try:
+            return await run_in_threadpool(model_host.generate_caption, request.image_url, request.decoding_profile)
+        except Exception as e:
+            print(f"❌ Model host caption request failed: {e}")
+            return {"error": f"Error during processing: {e}"}
+    return await generate_caption(request.image_url, request.decoding_profile)
@@ -1,8 +1,8 @@
-from fastapi import APIRouter
-from services.wardrobe_service import get_wardrobe_recs, flatten_recommendations, get_embedding_from_huggingface
+from fastapi import APIRouter, Request
+from services.wardrobe_service import get_wardrobe_recs, flatten_recommendations, get_embedding_from_huggingface, get_embeddings_from_huggingface
 from services.s3_service import S3Service
-from fastapi.responses import JSONResponse
-from models.request_models import TextRequest, MatchWardrobeRequest
+from utils.responses import NumpyORJSONResponse, vector_response
+from models.request_models import TextRequest, BatchTextRequest, MatchWardrobeRequest
 import numpy as np
 
 
@@ -11,12 +11,20 @@ s3_service = S3Service()
 
 
 @router.post("/vectorize")
-async def vectorize_text(request: TextRequest):
+async def vectorize_text(request: TextRequest, http_request: Request):
     """Vectorize the text."""
     vector = await get_embedding_from_huggingface(request.text)  
-    if vector is not None and isinstance(vector, np.ndarray):
-        vector = vector.tolist()
-    return JSONResponse(content={"vector": vector})
+    if vector is None or not isinstance(vector, np.ndarray):
+        return NumpyORJSONResponse(content={"vector": None})
+    return vector_response("vector", vector, http_request, request.encoding)
+
+@router.post("/vectorize/batch")
+async def vectorize_texts(request: BatchTextRequest, http_request: Request):
+    """Vectorize a batch of texts into a packed float32 matrix (one row per text)."""
+    vectors = await get_embeddings_from_huggingface(request.texts)
+    if vectors is None or not isinstance(vectors, np.ndarray):
+        return NumpyORJSONResponse(content={"vectors": None})
+    return vector_response("vectors", vectors, http_request, request.encoding)
 
 @router.post("/match")
 async def match_wardrobe(request: MatchWardrobeRequest):
@@ -46,8 +54,10 @@ async def match_wardrobe(request: MatchWardrobeRequest):
                     category_results[category] = {}
                 category_results[category][item_category] = results
 
-    print(category_results)
+    # Log a summary rather than the whole payload, which can be large
+    matched = sum(len(results) for items in category_results.values() for results in items.values())
+    print(f"Matched {matched} recommendation groups")
 
-    return JSONResponse(content={
+    return NumpyORJSONResponse(content={
         "recommendations": [flatten_recommendations(category_results)]
     })   
@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from api import image_captioning, wardrobe_routes
 from dotenv import load_dotenv
 from utils.database import check_connection
+from utils.admission_control import AdmissionControlMiddleware, build_limiters_from_env
+from utils.responses import NumpyORJSONResponse
 from contextlib import asynccontextmanager
 
 
@@ -19,7 +21,11 @@ async def lifespan(app: FastAPI):
 
     yield
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=NumpyORJSONResponse)
+
+# Bound concurrency on the GPU-bound routes and shed excess load with 503 + Retry-After.
+# Added before CORS so rejected responses still carry CORS headers.
+app.add_middleware(AdmissionControlMiddleware, limiters=build_limiters_from_env())
 
 # Enable CORS for frontend communication
 app.add_middleware(
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Literal
 
 class FashionRequest(BaseModel):
     description: str
@@ -13,9 +13,15 @@ class SignedUrlRequest(BaseModel):
 
 class ImageURLRequest(BaseModel):
     image_url: str
+    decoding_profile: Optional[Literal["fast", "balanced", "quality"]] = None  # defaults to CAPTION_DECODING_PROFILE
 
 class TextRequest(BaseModel):
     text: str
+    encoding: Optional[Literal["list", "base64"]] = None  # "base64" = packed float32 bytes
+
+class BatchTextRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=256)
+    encoding: Optional[Literal["list", "base64"]] = None
 
 class MatchWardrobeRequest(BaseModel):
     user_id: str
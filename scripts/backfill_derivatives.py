@@ -0,0 +1,50 @@
+"""
+Create caption/thumbnail derivatives for wardrobe items uploaded before the derivative pipeline.
+
+Usage:
+    python -m scripts.backfill_derivatives [--batch-size 50]
+
+Processes items without a thumbnail_url in batches (each item downloaded,
+resized and uploaded on a thread pool) and records the thumbnail URL.
+"""
+import argparse
+import os
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from services.derivative_service import create_derivatives_batch
+from utils.image_derivatives import derivative_url
+from utils.s3_utils import extract_s3_object_key
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill image derivatives for existing wardrobe items.")
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    collection = MongoClient(os.getenv("MONGO_URL"))["fabrecsai"]["wardrobe"]
+    items = list(collection.find({"thumbnail_url": None}, {"image_url": 1}))
+    print(f"📷 {len(items)} wardrobe items without derivatives")
+
+    done = 0
+    for start in range(0, len(items), args.batch_size):
+        batch = {}
+        for item in items[start:start + args.batch_size]:
+            s3_info = extract_s3_object_key(item["image_url"])
+            if s3_info:
+                batch[(s3_info["bucket"], s3_info["key"])] = item
+
+        results = create_derivatives_batch(list(batch))
+        for obj, rendered in results.items():
+            if rendered is not None:
+                item = batch[obj]
+                collection.update_one({"_id": item["_id"]}, {"$set": {"thumbnail_url": derivative_url(item["image_url"], "thumb")}})
+                done += 1
+        print(f"✅ {done}/{len(items)} items processed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark the caption decoding profiles.
+
+Usage:
+    python -m scripts.benchmark_decoding <image path or URL> [<image path or URL> ...] [--runs 3] [--reference quality]
+
+Reports per-profile latency and tokens/sec, plus how closely each profile's
+captions agree with the reference profile (exact match rate and average
+token overlap), so a latency/quality trade-off can be picked per client.
+"""
+import argparse
+import io
+import time
+from difflib import SequenceMatcher
+
+import requests
+import torch
+from PIL import Image
+
+from services.image_captioning_service import DECODING_PROFILES, caption_image, device
+
+
+def load_image(source: str) -> Image.Image:
+    if source.startswith("http://") or source.startswith("https://"):
+        response = requests.get(source)
+        response.raise_for_status()
+        return Image.open(io.BytesIO(response.content)).convert("RGB")
+    return Image.open(source).convert("RGB")
+
+
+def sync_device():
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+
+
+def run_profile(profile: str, images, runs: int):
+    captions = []
+    total_tokens = 0
+    total_time = 0.0
+
+    # Warm-up so the first profile doesn't pay for CUDA init / kernel selection
+    caption_image(images[0], profile)
+
+    for _ in range(runs):
+        captions = []
+        for image in images:
+            sync_device()
+            start = time.perf_counter()
+            caption, num_tokens = caption_image(image, profile)
+            sync_device()
+            total_time += time.perf_counter() - start
+            total_tokens += num_tokens
+            captions.append(caption)
+
+    calls = runs * len(images)
+    return {
+        "captions": captions,
+        "latency_ms": total_time / calls * 1000,
+        "tokens_per_sec": total_tokens / total_time if total_time else 0.0,
+    }
+
+
+def agreement(captions, reference):
+    exact = sum(c.strip().lower() == r.strip().lower() for c, r in zip(captions, reference)) / len(reference)
+    overlap = sum(
+        SequenceMatcher(None, c.lower().split(), r.lower().split()).ratio()
+        for c, r in zip(captions, reference)
+    ) / len(reference)
+    return exact, overlap
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark caption decoding profiles.")
+    parser.add_argument("images", nargs="+", help="Image file paths or URLs")
+    parser.add_argument("--runs", type=int, default=3, help="Timed passes over the images per profile")
+    parser.add_argument("--reference", default="quality", choices=list(DECODING_PROFILES), help="Profile to compare captions against")
+    args = parser.parse_args()
+
+    images = [load_image(source) for source in args.images]
+    print(f"📷 Loaded {len(images)} image(s), benchmarking on {device}")
+
+    results = {profile: run_profile(profile, images, args.runs) for profile in DECODING_PROFILES}
+    reference = results[args.reference]["captions"]
+
+    print(f"\n{'profile':<10} {'latency ms':>11} {'tokens/s':>10} {'exact match':>12} {'token overlap':>14}")
+    for profile, result in results.items():
+        exact, overlap = agreement(result["captions"], reference)
+        print(f"{profile:<10} {result['latency_ms']:>11.1f} {result['tokens_per_sec']:>10.1f} {exact:>12.0%} {overlap:>14.0%}")
+
+    print("\n📝 Captions:")
+    for i, source in enumerate(args.images):
+        print(f"  {source}")
+        for profile, result in results.items():
+            print(f"    {profile:<10} {result['captions'][i]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark the preprocessing fast path against the Hugging Face processors.
+
+Usage:
+    python -m scripts.benchmark_preprocessing [--images <image path> ...] [--iterations 200] [--image-processor rcfg/FashionBLIP-1]
+
+Text: plain tokenizer call per phrase vs TokenCache (cold and warm).
+Images: the captioning model's BlipProcessor vs FastImagePreprocessor (resize +
+on-device normalize), including the max pixel difference between the two paths.
+The processor config is loaded from the same repo as the service (with
+HUGGINGFACE_TOKEN for the private model).
+End-to-end per-stage timings are logged by the services with LOG_STAGE_TIMINGS=true.
+"""
+import argparse
+import os
+import time
+
+import torch
+from dotenv import load_dotenv
+from PIL import Image
+
+from utils.preprocessing import FastImagePreprocessor, TokenCache
+
+load_dotenv()
+
+PHRASES = [
+    "black leather jacket",
+    "white cotton t-shirt",
+    "navy blue slim fit jeans",
+    "red floral summer dress",
+    "beige trench coat",
+    "grey wool sweater",
+]
+
+
+def time_ms(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def benchmark_text(iterations: int):
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained('sentence-transformers/all-MiniLM-L6-v2', use_fast=True)
+
+    def baseline():
+        for phrase in PHRASES:
+            tokenizer([phrase], padding=True, truncation=True, return_tensors='pt')
+
+    def cold():
+        TokenCache(tokenizer).encode(PHRASES)
+
+    warm_cache = TokenCache(tokenizer)
+    warm_cache.encode(PHRASES)
+
+    def warm():
+        warm_cache.encode(PHRASES)
+
+    expected = tokenizer(PHRASES, padding=True, truncation=True, return_tensors='pt')
+    cached = warm_cache.encode(PHRASES)
+    identical = all(torch.equal(expected[key], cached[key]) for key in expected.keys())
+
+    print(f"📝 Tokenization of {len(PHRASES)} phrases (ids identical to tokenizer: {'✅' if identical else '❌'})")
+    print(f"   tokenizer per phrase   {time_ms(baseline, iterations):8.3f} ms")
+    print(f"   TokenCache batch, cold {time_ms(cold, iterations):8.3f} ms")
+    print(f"   TokenCache batch, warm {time_ms(warm, iterations):8.3f} ms")
+
+
+def benchmark_images(image_paths, iterations: int, repo_id: str):
+    from transformers import BlipImageProcessor
+
+    hf_token = os.getenv("HUGGINGFACE_TOKEN")
+    token_kwargs = {"token": hf_token} if hf_token else {}
+    image_processor = BlipImageProcessor.from_pretrained(repo_id, **token_kwargs)
+    fast = FastImagePreprocessor(image_processor)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    for path in image_paths:
+        image = Image.open(path).convert("RGB")
+
+        def baseline():
+            image_processor(images=image, return_tensors="pt")
+
+        def fast_path():
+            pixels = fast(image)["pixel_values"].to(device)
+            fast.normalize(pixels, torch.float32)
+            if device.type == "cuda":
+                torch.cuda.synchronize()
+
+        expected = image_processor(images=image, return_tensors="pt")["pixel_values"]
+        actual = fast.normalize(fast(image)["pixel_values"], torch.float32)
+        max_diff = float((expected - actual).abs().max())
+
+        print(f"📷 {path} {image.size} -> {fast.width}x{fast.height} (max pixel diff {max_diff:.4f})")
+        print(f"   BlipProcessor          {time_ms(baseline, iterations):8.3f} ms")
+        print(f"   FastImagePreprocessor  {time_ms(fast_path, iterations):8.3f} ms ({device})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the preprocessing fast path.")
+    parser.add_argument("--images", nargs="*", default=[], help="Local image files to preprocess")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--image-processor", default="rcfg/FashionBLIP-1", help="Repo to load the BLIP image processor config from (the service's model by default)")
+    args = parser.parse_args()
+
+    benchmark_text(args.iterations)
+    if args.images:
+        benchmark_images(args.images, max(1, args.iterations // 10), args.image_processor)
+
+
+if __name__ == "__main__":
+    main()
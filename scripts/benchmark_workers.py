@@ -0,0 +1,72 @@
+"""
+Measure API throughput, e.g. to compare worker counts in multi-worker mode.
+
+Usage:
+    python -m scripts.benchmark_workers [--url http://127.0.0.1:5000] [--concurrency 32] [--duration 20]
+
+Sends /api/wardrobe/vectorize requests (or --caption-image captions) from
+--concurrency parallel clients for --duration seconds and reports requests/sec,
+latency percentiles and the share of shed (429/503) responses. Run it once per
+deployment, e.g. against `python -m scripts.serve_multiworker --workers 1`, 2, 4.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+PHRASES = [
+    "black leather jacket",
+    "white cotton t-shirt",
+    "navy blue slim fit jeans",
+    "red floral summer dress",
+    "beige trench coat",
+    "grey wool sweater",
+]
+
+
+async def client_loop(client: httpx.AsyncClient, args, deadline: float, latencies, statuses):
+    while time.monotonic() < deadline:
+        if args.caption_image:
+            path, body = "/api/caption/", {"image_url": args.caption_image}
+        else:
+            path, body = "/api/wardrobe/vectorize", {"text": f"{random.choice(PHRASES)} {random.randint(0, 999)}"}
+
+        start = time.perf_counter()
+        try:
+            response = await client.post(path, json=body)
+            statuses.append(response.status_code)
+        except httpx.HTTPError:
+            statuses.append(0)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(args):
+    latencies, statuses = [], []
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        deadline = time.monotonic() + args.duration
+        await asyncio.gather(*[client_loop(client, args, deadline, latencies, statuses) for _ in range(args.concurrency)])
+
+    ok = sum(status == 200 for status in statuses)
+    shed = sum(status in (429, 503) for status in statuses)
+    latencies.sort()
+    print(f"requests: {len(statuses)} ({ok} ok, {shed} shed, {len(statuses) - ok - shed} failed)")
+    print(f"throughput: {ok / args.duration:.1f} req/s")
+    if latencies:
+        print(f"latency p50={statistics.median(latencies) * 1000:.1f}ms p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API throughput.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--caption-image", help="Benchmark /api/caption with this image URL instead of /vectorize")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
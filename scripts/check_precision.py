@@ -0,0 +1,102 @@
+"""
+Check that the accelerated inference path matches the fp32 baseline.
+
+Usage:
+    python -m scripts.check_precision [--images <image path> ...] [--atol 0.02]
+
+Runs the services' models (loaded in INFERENCE_DTYPE with pinned-memory
+transfers) next to a fresh fp32 load of the same checkpoints and reports
+the embedding difference for MiniLM and caption agreement for BLIP.
+"""
+import argparse
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from PIL import Image
+from transformers import AutoModel, BlipForConditionalGeneration
+
+from services import text_vectorization_service as text_service
+
+PHRASES = [
+    "black leather jacket",
+    "white cotton t-shirt",
+    "navy blue slim fit jeans",
+    "red floral summer dress",
+    "beige trench coat",
+    "grey wool sweater",
+]
+
+
+def fp32_text_vector(fp32_model, text):
+    encoded_input = text_service.tokenizer([text], padding=True, truncation=True, return_tensors='pt')
+    encoded_input = {k: v.to(text_service.device) for k, v in encoded_input.items()}
+    with torch.no_grad():
+        model_output = fp32_model(**encoded_input)
+    sentence_embeddings = text_service.mean_pooling(model_output, encoded_input['attention_mask'])
+    sentence_embeddings = F.normalize(sentence_embeddings, p=2, dim=1)
+    return sentence_embeddings[0].cpu().numpy()
+
+
+def check_text(atol: float) -> bool:
+    print(f"📝 MiniLM: {text_service.inference_dtype} on {text_service.device} vs fp32")
+    # Load the checkpoint again in fp32: upcasting the service's half precision
+    # weights would keep their rounding and hide the error we want to measure
+    fp32_model = AutoModel.from_pretrained('sentence-transformers/all-MiniLM-L6-v2', torch_dtype=torch.float32)
+    fp32_model = fp32_model.to(text_service.device).eval()
+
+    max_abs_diff = 0.0
+    min_cosine = 1.0
+    for phrase in PHRASES:
+        fast = text_service.get_text_vector(phrase)
+        baseline = fp32_text_vector(fp32_model, phrase)
+        max_abs_diff = max(max_abs_diff, float(np.max(np.abs(fast - baseline))))
+        min_cosine = min(min_cosine, float(np.dot(fast, baseline)))
+
+    ok = max_abs_diff <= atol
+    print(f"   max |diff| = {max_abs_diff:.5f}, min cosine = {min_cosine:.5f} -> {'✅ within' if ok else '❌ outside'} tolerance {atol}")
+    return ok
+
+
+def check_captions(image_paths) -> bool:
+    from services import image_captioning_service as caption_service
+
+    print(f"📷 BLIP: {caption_service.inference_dtype} on {caption_service.device} vs fp32")
+    token_kwargs = {"token": caption_service.hf_token} if caption_service.hf_token else {}
+    fp32_model = BlipForConditionalGeneration.from_pretrained("rcfg/FashionBLIP-1", torch_dtype=torch.float32, **token_kwargs)
+    fp32_model = fp32_model.to(caption_service.device).eval()
+    generation_kwargs = caption_service.get_generation_kwargs()
+
+    matches = 0
+    for path in image_paths:
+        image = Image.open(path).convert("RGB")
+        fast, _ = caption_service.caption_image(image)
+
+        inputs = caption_service.processor(images=image, return_tensors="pt")
+        inputs = {k: v.to(caption_service.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            caption_ids = fp32_model.generate(**inputs, **generation_kwargs)
+        baseline = caption_service.processor.decode(caption_ids[0], skip_special_tokens=True)
+
+        matches += fast == baseline
+        print(f"   {'✅' if fast == baseline else '❌'} {path}: '{fast}' vs fp32 '{baseline}'")
+
+    print(f"   {matches}/{len(image_paths)} captions identical to fp32")
+    return matches == len(image_paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare accelerated inference against the fp32 baseline.")
+    parser.add_argument("--images", nargs="*", default=[], help="Local image files to caption")
+    parser.add_argument("--atol", type=float, default=0.02, help="Max absolute embedding difference allowed")
+    args = parser.parse_args()
+
+    ok = check_text(args.atol)
+    if args.images:
+        ok = check_captions(args.images) and ok
+
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
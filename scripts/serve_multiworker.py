@@ -0,0 +1,76 @@
+"""
+Run the API with several uvicorn workers sharing one model host.
+
+Usage:
+    python -m scripts.serve_multiworker [--workers 4] [--port 5000]
+
+Starts `python -m services.model_host` (which loads the models once), waits
+until it answers, then starts uvicorn with MODEL_HOST_SOCKET set so the
+workers forward inference to it instead of loading their own copies.
+Each launch generates a fresh random MODEL_HOST_AUTHKEY and, unless --socket
+is given, puts the socket in a new private (0700) temporary directory.
+"""
+import argparse
+import os
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from services.model_host import ModelHostClient
+
+
+def wait_for_model_host(host: subprocess.Popen, address: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if host.poll() is not None:
+            return False
+        try:
+            if ModelHostClient(address).ping():
+                return True
+        except (OSError, ConnectionError):
+            pass
+        time.sleep(1)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API with multiple workers and a shared model host.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--socket", default=os.getenv("MODEL_HOST_SOCKET"), help="Socket path (default: a new private temporary directory)")
+    parser.add_argument("--startup-timeout", type=float, default=600, help="Seconds to wait for the models to load")
+    args = parser.parse_args()
+
+    socket_dir = None
+    if not args.socket:
+        # mkdtemp creates the directory with mode 0700
+        socket_dir = tempfile.mkdtemp(prefix="fabrecs-model-host-")
+        args.socket = os.path.join(socket_dir, "model-host.sock")
+
+    # Fresh secret per launch, shared only with our own child processes
+    os.environ["MODEL_HOST_AUTHKEY"] = secrets.token_hex(32)
+    env = dict(os.environ, MODEL_HOST_SOCKET=args.socket)
+    host = subprocess.Popen([sys.executable, "-m", "services.model_host"], env=env)
+    try:
+        if not wait_for_model_host(host, args.socket, args.startup_timeout):
+            print("❌ Model host failed to start")
+            raise SystemExit(1)
+
+        print(f"🚀 Starting {args.workers} API workers")
+        subprocess.run(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", args.host, "--port", str(args.port), "--workers", str(args.workers)],
+            env=env,
+        )
+    finally:
+        host.terminate()
+        host.wait()
+        if socket_dir:
+            shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
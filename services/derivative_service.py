@@ -0,0 +1,172 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+from PIL import Image
+
+from utils import s3_utils
+from utils.deadline import read_with_deadline
+from utils.image_derivatives import (
+    DERIVATIVE_VARIANTS,
+    derivative_key,
+    encode_jpeg,
+    is_derivative_key,
+    open_original,
+    render_derivatives,
+    resize_variants,
+)
+
+# Load environment variables
+load_dotenv()
+
+# Rendering runs in-process on these threads too: PIL releases the GIL while
+# decoding, resizing and encoding, so no worker processes (and no re-import of
+# __main__) are needed
+S3_IO_THREADS = int(os.getenv("DERIVATIVE_IO_THREADS", "8"))
+
+_io_pool = None
+
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(max_workers=S3_IO_THREADS)
+    return _io_pool
+
+
+def _is_missing(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+
+def _download(bucket: str, key: str, deadline: float = None) -> bytes:
+    body = s3_utils.s3_client.get_object(Bucket=bucket, Key=key)["Body"]
+    if deadline is None:
+        return body.read()
+    return read_with_deadline(body.iter_chunks(64 * 1024), deadline, f"S3 download of {key}")
+
+
+def _upload_derivatives(bucket: str, key: str, rendered: Dict[str, bytes]):
+    for variant, data in rendered.items():
+        s3_utils.s3_client.put_object(
+            Bucket=bucket,
+            Key=derivative_key(key, variant),
+            Body=data,
+            ContentType="image/jpeg"
+        )
+
+
+def _create_one(bucket: str, key: str) -> Dict[str, bytes]:
+    rendered = render_derivatives(_download(bucket, key))
+    _upload_derivatives(bucket, key, rendered)
+    return rendered
+
+
+def create_derivatives_batch(objects: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[Dict[str, bytes]]]:
+    """
+    Render and upload the caption/thumbnail derivatives for many originals.
+
+    Each original is downloaded, rendered and uploaded on the I/O thread pool.
+    Returns {(bucket, key): rendered bytes per variant}, or None for originals
+    that failed.
+    """
+    if not s3_utils.s3_client:
+        raise ValueError("S3 client is not configured due to missing environment variables")
+
+    io_pool = _get_io_pool()
+    futures = {obj: io_pool.submit(_create_one, *obj) for obj in objects}
+    results = {}
+    for obj, future in futures.items():
+        try:
+            results[obj] = future.result()
+        except Exception as e:
+            print(f"❌ Failed to create derivatives for {obj[1]}: {e}")
+            results[obj] = None
+
+    return results
+
+
+def _log_upload_result(key: str):
+    def callback(future):
+        error = future.exception()
+        if error is not None:
+            print(f"❌ Failed to upload derivatives for {key}: {error}")
+    return callback
+
+
+def create_derivatives(bucket: str, key: str, image_bytes: bytes = None) -> Dict[str, bytes]:
+    """Render and upload the derivatives for one original (downloaded unless `image_bytes` is given)."""
+    if image_bytes is None:
+        image_bytes = _download(bucket, key)
+    rendered = render_derivatives(image_bytes)
+    _upload_derivatives(bucket, key, rendered)
+    return rendered
+
+
+def _encode_and_upload(bucket: str, key: str, resized: Dict[str, Image.Image]):
+    _upload_derivatives(bucket, key, {variant: encode_jpeg(image) for variant, image in resized.items()})
+
+
+def derivatives_exist(bucket: str, key: str) -> bool:
+    try:
+        for variant in DERIVATIVE_VARIANTS:
+            s3_utils.s3_client.head_object(Bucket=bucket, Key=derivative_key(key, variant))
+        return True
+    except ClientError as e:
+        if _is_missing(e):
+            return False
+        raise
+
+
+def ensure_derivatives(image_url: str) -> bool:
+    """Create the derivatives for an S3 image URL unless they already exist. Returns True if they exist afterwards."""
+    s3_info = s3_utils.extract_s3_object_key(image_url)
+    if not s3_info or not s3_utils.s3_client or is_derivative_key(s3_info["key"]):
+        return False
+    try:
+        if not derivatives_exist(s3_info["bucket"], s3_info["key"]):
+            create_derivatives(s3_info["bucket"], s3_info["key"])
+        return True
+    except Exception as e:
+        print(f"❌ Could not create derivatives for {image_url}: {e}")
+        return False
+
+
+def _decode(image_bytes: bytes) -> Image.Image:
+    return Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+
+def get_caption_image(bucket: str, key: str, deadline: float = None) -> Image.Image:
+    """
+    Return the captioning-sized image for an original, decoded and ready for the model.
+
+    Originals without derivatives (new uploads, or uploads from before the
+    pipeline) are decoded once and resized in memory, and the caption uses that
+    image directly. Encoding and uploading the derivatives run in the
+    background, so a failed upload (e.g. no s3:PutObject) never fails or delays
+    the caption. If resizing fails, the original is captioned as before.
+    Downloads give up once `deadline` (time.monotonic()) passes.
+    """
+    if is_derivative_key(key):
+        # Already a derivative; don't create <id>_caption_caption.jpg
+        return _decode(_download(bucket, key, deadline))
+
+    try:
+        return _decode(_download(bucket, derivative_key(key, "caption"), deadline))
+    except ClientError as e:
+        # Without s3:ListBucket a missing key comes back as 403, not 404
+        if not _is_missing(e):
+            print(f"Could not read caption derivative for {key}: {e}")
+
+    print(f"No caption derivative for {key}, creating derivatives from the original")
+    original = _download(bucket, key, deadline)
+    try:
+        resized = resize_variants(open_original(original))
+    except Exception as e:
+        print(f"❌ Could not render derivatives for {key}: {e}. Captioning the original.")
+        return _decode(original)
+
+    _get_io_pool().submit(_encode_and_upload, bucket, key, resized).add_done_callback(_log_upload_result(key))
+    return resized["caption"]
@@ -1,12 +1,14 @@
 from transformers import BlipProcessor, BlipForConditionalGeneration
 from PIL import Image
-import io
-import boto3
 import os
+from typing import List
 from dotenv import load_dotenv
-from urllib.parse import urlparse
-import requests
 import torch
+from starlette.concurrency import run_in_threadpool
+from utils.inference import get_inference_dtype, PinnedInputStager
+from utils.preprocessing import FastImagePreprocessor
+from utils.timing import StageTimer
+from services.image_download_service import caption_from_url
 
 # Load environment variables for S3 access
 load_dotenv()
@@ -38,27 +40,6 @@ else:
         print(f"❌ Authentication failed: {auth_error}")
         print("Please check if your token is valid and has the correct permissions.")
 
-# --- S3 Client Setup ---
-# Reusing the pattern from s3_service
-aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
-aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-aws_region = os.getenv("AWS_REGION")
-
-s3_client = None
-if all([aws_access_key_id, aws_secret_access_key, aws_region]):
-    try:
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key,
-            region_name=aws_region
-        )
-        print("S3 client initialized successfully for image download.")
-    except Exception as e:
-        print(f"Warning: Error creating S3 client for image download: {e}. Will attempt direct download.")
-else:
-    print("Warning: AWS credentials not fully configured for S3 client. Will attempt direct download.")
-
 # Load Image Captioning Model
 try:
     if hf_token:
@@ -103,89 +84,136 @@ except Exception as e:
     print("5. Ensure the repository name 'rcfg/FashionBLIP-1' is correct")
     raise e
 
-# Move model to GPU if available
-model = model.to(device)
-print(f"✅ Model loaded and moved to {device}")
+# Move model to GPU if available, in half precision there (fp32 on CPU)
+inference_dtype = get_inference_dtype(device)
+model = model.to(device, dtype=inference_dtype)
+print(f"✅ Model loaded and moved to {device} ({inference_dtype})")
 
-# Enable evaluation mode for inference
-model.eval()
+# Stages pixel tensors through pinned host buffers for non-blocking copies
+input_stager = PinnedInputStager(device, dtype=inference_dtype)
 
-async def generate_caption(image_url: str):
-    """Generate an image caption from an image URL (downloads from S3 or public)."""
+# Resize with PIL on uint8 and normalize on the device instead of running the
+# generic BlipProcessor loop; FAST_PREPROCESSING=false restores the processor path
+fast_image_preprocessor = None
+if os.getenv("FAST_PREPROCESSING", "true").lower() in ("1", "true", "yes"):
     try:
-        print(f"📷 Received Image URL: {image_url}")
-
-        image_bytes = None
-
-        # Attempt to download using S3 client first
-        if s3_client:
-            try:
-                parsed_url = urlparse(image_url)
-                if parsed_url.netloc.endswith('.amazonaws.com'): # Basic check for S3 URL
-                    # Assumes bucket name is part of the hostname or path depending on URL format
-                    # Example: https://<bucket-name>.s3.<region>.amazonaws.com/<key>
-                    # Example: https://s3.<region>.amazonaws.com/<bucket-name>/<key>
-                    bucket_name = None
-                    object_key = parsed_url.path.lstrip('/')
-
-                    host_parts = parsed_url.netloc.split('.')
-                    if len(host_parts) > 3 and host_parts[1] == 's3': # Format: <bucket>.s3... or s3.<region>...<bucket>/key
-                        if host_parts[0] != 's3':
-                             bucket_name = host_parts[0]
-                        else:
-                             # Try extracting bucket from path
-                             path_parts = object_key.split('/', 1)
-                             if len(path_parts) > 1:
-                                 bucket_name = path_parts[0]
-                                 object_key = path_parts[1]
-
-                    if bucket_name and object_key:
-                        print(f"Attempting S3 download: Bucket={bucket_name}, Key={object_key}")
-                        s3_response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
-                        image_bytes = s3_response['Body'].read()
-                        print("✅ Image Downloaded via S3")
-                    else:
-                         print("Could not determine S3 bucket/key from URL, falling back to direct download.")
-                else:
-                    print("URL does not look like an S3 URL, falling back to direct download.")
-            except Exception as s3_error:
-                print(f"S3 download failed: {s3_error}. Falling back to direct download.")
-
-        # Fallback: Attempt direct download (for public URLs or if S3 failed)
-        if image_bytes is None:
-            print("Attempting direct HTTP download...")
-            response = requests.get(image_url, stream=True)
-            response.raise_for_status() # Raise an exception for bad status codes
-            image_bytes = response.content
-            print("✅ Image Downloaded via HTTP GET")
-
-        # Process the downloaded image bytes (same as before)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        print("✅ Image Loaded Successfully")
-
-        # Process image and generate caption (same as before)
-        inputs = processor(images=image, return_tensors="pt")
-        
-        # Move inputs to the same device as the model
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-        
-        # Generate caption with no gradient computation for efficiency
-        with torch.no_grad():
-            caption_ids = model.generate(**inputs, max_length=150)
-        
-        caption = processor.decode(caption_ids[0], skip_special_tokens=True)
-        print("📝 Generated Caption:", caption)
+        fast_image_preprocessor = FastImagePreprocessor(processor.image_processor)
+        print("✅ Fast image preprocessing enabled")
+    except Exception as e:
+        print(f"❌ Warning: Fast image preprocessing unavailable ({e}), using BlipProcessor.")
 
-        return {"caption": caption}
+# Enable evaluation mode for inference
+model.eval()
 
-    except requests.exceptions.RequestException as http_err:
-        print(f"❌ HTTP Error downloading image: {http_err}")
-        return {"error": f"Failed to download image from URL: {http_err}"}
-    except Exception as e:
-        print(f"❌ Error processing image/captioning: {e}")
-        # Provide more specific error context if possible
-        error_detail = f"Error during processing: {e}"
-        if 's3_response' in locals() and 'Error' in s3_response:
-             error_detail = f"S3 Error: {s3_response['Error']}"
-        return {"error": error_detail}
+# --- Decoding Profiles ---
+# Fashion captions are ~10-25 tokens, so cap generated length with max_new_tokens
+# instead of the old max_length=150. "fast" is greedy (same decoding as before),
+# the beam profiles trade latency for caption quality.
+DECODING_PROFILES = {
+    "fast": {
+        "num_beams": 1,
+        "do_sample": False,
+        "max_new_tokens": 32,
+    },
+    "balanced": {
+        "num_beams": 3,
+        "do_sample": False,
+        "max_new_tokens": 40,
+        "early_stopping": True,
+    },
+    "quality": {
+        "num_beams": 5,
+        "do_sample": False,
+        "max_new_tokens": 50,
+        "early_stopping": True,
+        "repetition_penalty": 1.2,
+    },
+}
+
+DEFAULT_DECODING_PROFILE = os.getenv("CAPTION_DECODING_PROFILE", "fast")
+if DEFAULT_DECODING_PROFILE not in DECODING_PROFILES:
+    print(f"❌ Warning: Unknown CAPTION_DECODING_PROFILE '{DEFAULT_DECODING_PROFILE}', using 'fast'.")
+    DEFAULT_DECODING_PROFILE = "fast"
+
+# Static KV cache avoids re-allocating the cache every step, but not every
+# architecture supports it, so only enable it when asked and supported
+use_static_cache = os.getenv("CAPTION_STATIC_CACHE", "false").lower() in ("1", "true", "yes")
+if use_static_cache and not getattr(model, "_supports_static_cache", False):
+    print("❌ Warning: CAPTION_STATIC_CACHE is set but the model does not support a static cache. Using the default KV cache.")
+    use_static_cache = False
+
+def get_generation_kwargs(profile: str = None) -> dict:
+    """Return the model.generate() keyword arguments for a decoding profile."""
+    profile = profile or DEFAULT_DECODING_PROFILE
+    if profile not in DECODING_PROFILES:
+        raise ValueError(f"Unknown decoding profile '{profile}'. Available profiles: {', '.join(DECODING_PROFILES)}")
+
+    generation_kwargs = dict(DECODING_PROFILES[profile])
+    generation_kwargs["use_cache"] = True
+    if use_static_cache:
+        generation_kwargs["cache_implementation"] = "static"
+    return generation_kwargs
+
+def caption_image(image: Image.Image, profile: str = None):
+    """
+    Caption an already loaded RGB image.
+
+    Returns:
+        tuple: (caption, number of generated tokens, up to and including EOS)
+    """
+    return caption_images([image], profile)[0]
+
+def caption_images(images: List[Image.Image], profile: str = None):
+    """Caption several RGB images with one generate() call. Returns a (caption, token count) tuple per image."""
+    generation_kwargs = get_generation_kwargs(profile)
+    timer = StageTimer(device)
+
+    with timer.stage("preprocess"):
+        if fast_image_preprocessor:
+            pixel_values = [fast_image_preprocessor(image)["pixel_values"] for image in images]
+            inputs = {"pixel_values": torch.cat(pixel_values)}
+        else:
+            inputs = processor(images=images, return_tensors="pt")
+
+    # Move inputs to the same device and dtype as the model
+    with timer.stage("transfer"):
+        inputs = input_stager.to_device(inputs)
+        if fast_image_preprocessor:
+            inputs["pixel_values"] = fast_image_preprocessor.normalize(inputs["pixel_values"], inference_dtype)
+
+    # Generate captions with no gradient computation for efficiency
+    with timer.stage("generate"), torch.no_grad():
+        caption_ids = model.generate(**inputs, **generation_kwargs)
+
+    with timer.stage("decode"):
+        captions = processor.batch_decode(caption_ids, skip_special_tokens=True)
+
+    timer.report("Caption")
+    return [(caption, count_generated_tokens(ids, inputs)) for caption, ids in zip(captions, caption_ids)]
+
+def count_generated_tokens(sequence: torch.Tensor, inputs: dict) -> int:
+    """Count the tokens the decoder actually generated: skip the prompt (BOS), stop at EOS, ignore beam padding."""
+    prompt_length = inputs["input_ids"].shape[-1] if "input_ids" in inputs else 1
+    generated = sequence[prompt_length:].tolist()
+
+    eos_token_ids = model.generation_config.eos_token_id
+    if eos_token_ids is None:
+        eos_token_ids = []
+    elif isinstance(eos_token_ids, int):
+        eos_token_ids = [eos_token_ids]
+
+    for i, token_id in enumerate(generated):
+        if token_id in eos_token_ids:
+            return i + 1
+
+    pad_token_id = model.generation_config.pad_token_id
+    return sum(token_id != pad_token_id for token_id in generated)
+
+async def generate_caption(image_url: str, decoding_profile: str = None):
+    """Generate an image caption from an image URL (downloads from S3 or public)."""
+    # Download and generation block, so run them off the event loop to keep
+    # admission control and other requests responsive while the GPU is busy
+    return await run_in_threadpool(_generate_caption_sync, image_url, decoding_profile)
 
+def _generate_caption_sync(image_url: str, decoding_profile: str = None):
+    return caption_from_url(image_url, lambda image: caption_image(image, decoding_profile)[0])
@@ -0,0 +1,105 @@
+import io
+import os
+import time
+from typing import Callable
+from urllib.parse import urlparse
+
+import requests
+from PIL import Image
+from dotenv import load_dotenv
+
+from services.derivative_service import get_caption_image
+from utils import s3_utils
+from utils.deadline import read_with_deadline, remaining
+
+# Load environment variables
+load_dotenv()
+
+# Image URLs come from clients and each download holds an admission slot, so
+# every download is bounded: per-socket timeouts plus a total deadline that
+# covers the S3 attempt and the HTTP fallback together
+DOWNLOAD_CONNECT_TIMEOUT = float(os.getenv("CAPTION_DOWNLOAD_CONNECT_TIMEOUT", "5"))
+DOWNLOAD_READ_TIMEOUT = float(os.getenv("CAPTION_DOWNLOAD_READ_TIMEOUT", "10"))
+DOWNLOAD_TOTAL_TIMEOUT = float(os.getenv("CAPTION_DOWNLOAD_TIMEOUT", "20"))
+
+
+def download_image(image_url: str) -> Image.Image:
+    """Download and decode the image to caption: the S3 caption derivative when possible, else a direct HTTP GET."""
+    image = None
+    deadline = time.monotonic() + DOWNLOAD_TOTAL_TIMEOUT
+
+    # Attempt to download using S3 client first
+    if s3_utils.s3_client:
+        try:
+            parsed_url = urlparse(image_url)
+            if parsed_url.netloc.endswith('.amazonaws.com'): # Basic check for S3 URL
+                # Assumes bucket name is part of the hostname or path depending on URL format
+                # Example: https://<bucket-name>.s3.<region>.amazonaws.com/<key>
+                # Example: https://s3.<region>.amazonaws.com/<bucket-name>/<key>
+                bucket_name = None
+                object_key = parsed_url.path.lstrip('/')
+
+                host_parts = parsed_url.netloc.split('.')
+                if len(host_parts) > 3 and host_parts[1] == 's3': # Format: <bucket>.s3... or s3.<region>...<bucket>/key
+                    if host_parts[0] != 's3':
+                         bucket_name = host_parts[0]
+                    else:
+                         # Try extracting bucket from path
+                         path_parts = object_key.split('/', 1)
+                         if len(path_parts) > 1:
+                             bucket_name = path_parts[0]
+                             object_key = path_parts[1]
+
+                if bucket_name and object_key:
+                    print(f"Attempting S3 download: Bucket={bucket_name}, Key={object_key}")
+                    # Caption from the ~384px derivative instead of the full-size original
+                    image = get_caption_image(bucket_name, object_key, deadline)
+                    print("✅ Image Downloaded via S3 (caption-sized derivative)")
+                else:
+                     print("Could not determine S3 bucket/key from URL, falling back to direct download.")
+            else:
+                print("URL does not look like an S3 URL, falling back to direct download.")
+        except Exception as s3_error:
+            print(f"S3 download failed: {s3_error}. Falling back to direct download.")
+
+    # Fallback: Attempt direct download (for public URLs or if S3 failed)
+    if image is None:
+        print("Attempting direct HTTP download...")
+        left = remaining(deadline)
+        timeout = (min(DOWNLOAD_CONNECT_TIMEOUT, left), min(DOWNLOAD_READ_TIMEOUT, left))
+        with requests.get(image_url, stream=True, timeout=timeout) as response:
+            response.raise_for_status() # Raise an exception for bad status codes
+            image_bytes = read_with_deadline(response.iter_content(64 * 1024), deadline, "Image download")
+        print("✅ Image Downloaded via HTTP GET")
+        image = load_image(image_bytes)
+
+    return image
+
+
+def load_image(image_bytes: bytes) -> Image.Image:
+    return Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+
+def caption_from_url(image_url: str, caption: Callable[[Image.Image], str]) -> dict:
+    """
+    Download and decode the image at `image_url` and caption it with `caption`.
+
+    Returns {"caption": ...}, or {"error": ...} if anything fails. Shared by the
+    in-process service and model-host workers, which caption on the host.
+    """
+    try:
+        print(f"📷 Received Image URL: {image_url}")
+        image = download_image(image_url)
+        print("✅ Image Loaded Successfully")
+
+        text = caption(image)
+        print("📝 Generated Caption:", text)
+
+        return {"caption": text}
+
+    except requests.exceptions.RequestException as http_err:
+        print(f"❌ HTTP Error downloading image: {http_err}")
+        return {"error": f"Failed to download image from URL: {http_err}"}
+    except Exception as e:
+        print(f"❌ Error processing image/captioning: {e}")
+        return {"error": f"Error during processing: {e}"}
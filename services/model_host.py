@@ -0,0 +1,276 @@
+"""
+Model host for multi-worker deployments.
+
+One model-host process owns the BLIP and MiniLM weights and serves inference
+over a local Unix socket. API workers (uvicorn --workers N) started with
+MODEL_HOST_SOCKET set talk to it through ModelHostClient instead of loading
+their own copy of the models.
+
+Text vectorization requests from all workers are collected into batches
+(up to MODEL_HOST_MAX_BATCH texts, waiting at most MODEL_HOST_BATCH_WAIT_MS)
+and run as a single forward pass. Workers download and decode caption images
+themselves and send uint8 pixels, so the host only runs the model: captions
+are batched per decoding profile (up to MODEL_HOST_CAPTION_MAX_BATCH images)
+the same way.
+
+The socket is created inside a directory only the current user can access
+(0700), and both sides must share MODEL_HOST_AUTHKEY. Without a key the host
+refuses to serve and workers refuse to connect. scripts/serve_multiworker.py
+generates a random key per launch.
+
+Usage:
+    MODEL_HOST_AUTHKEY=<secret> python -m services.model_host
+"""
+import os
+import queue
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+from dotenv import load_dotenv
+from PIL import Image
+
+from services.image_download_service import caption_from_url
+
+# Load environment variables
+load_dotenv()
+
+# multiprocessing.connection unpickles whatever it receives, so the socket lives
+# in a directory only this user can enter and both sides must share a secret key
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"fabrecs-model-host-{os.getuid()}", "model-host.sock")
+
+
+def _get_authkey() -> bytes:
+    authkey = os.getenv("MODEL_HOST_AUTHKEY")
+    if not authkey:
+        raise ValueError("MODEL_HOST_AUTHKEY is not set; refusing to use the model host without a secret key.")
+    return authkey.encode()
+
+
+def _check_private_dir(directory: str):
+    """Raise unless `directory` is owned by the current user and closed to everyone else (0700)."""
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"Model host socket directory {directory} must be a directory owned by this user with mode 0700.")
+
+
+def ensure_private_socket_dir(address: str):
+    """Create the socket's parent directory with mode 0700, or verify an existing one is private."""
+    directory = os.path.dirname(os.path.abspath(address))
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    _check_private_dir(directory)
+
+
+class ModelHostClient:
+    """
+    Thread-safe client for the model host.
+
+    Keeps a pool of socket connections with one request in flight per
+    connection, so it can be called from the API worker's threadpool.
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self._authkey = _get_authkey()
+        _check_private_dir(os.path.dirname(os.path.abspath(address)))
+        self._connections = queue.LifoQueue()
+
+    def _call(self, op: str, *args):
+        try:
+            conn = self._connections.get_nowait()
+        except queue.Empty:
+            conn = Client(self.address, family="AF_UNIX", authkey=self._authkey)
+
+        try:
+            conn.send((op, args))
+            status, value = conn.recv()
+        except (EOFError, OSError) as e:
+            conn.close()
+            raise ConnectionError(f"Lost connection to model host at {self.address}: {e}")
+
+        self._connections.put(conn)
+        if status == "error":
+            raise RuntimeError(f"Model host error: {value}")
+        return value
+
+    def ping(self) -> bool:
+        return self._call("ping") == "pong"
+
+    def get_text_vectors(self, texts):
+        return self._call("vectorize", list(texts))
+
+    def get_text_vector(self, text):
+        return self.get_text_vectors([text])[0]
+
+    def caption_pixels(self, pixels: np.ndarray, decoding_profile: str = None) -> str:
+        return self._call("caption", pixels, decoding_profile)
+
+    def generate_caption(self, image_url: str, decoding_profile: str = None):
+        # Download and decode here, so the host never spends GPU time waiting on the network
+        return caption_from_url(
+            image_url,
+            lambda image: self.caption_pixels(np.asarray(image, dtype=np.uint8), decoding_profile)
+        )
+
+
+_client = None
+
+
+def get_model_host_client():
+    """Return the shared ModelHostClient if MODEL_HOST_SOCKET is set, otherwise None (models run in-process)."""
+    global _client
+    address = os.getenv("MODEL_HOST_SOCKET")
+    if not address:
+        return None
+    if _client is None:
+        _client = ModelHostClient(address)
+        print(f"🔌 Using model host at {address}")
+    return _client
+
+
+class Batcher:
+    """
+    Collects requests from all connections and runs them as one batch.
+
+    Each request is a list of items; `run_batch` gets the items of every
+    collected request and returns one result per item, in order.
+    """
+
+    def __init__(self, run_batch, max_batch: int, max_wait: float, name: str = "batcher"):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name=name, daemon=True).start()
+
+    def submit(self, items) -> Future:
+        future = Future()
+        self._queue.put((items, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for request_items, _ in batch for item in request_items]
+            try:
+                results = self.run_batch(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_items, future in batch:
+                future.set_result(results[offset:offset + len(request_items)])
+                offset += len(request_items)
+
+
+def serve(address: str = None):
+    """Load the models once and serve inference requests on a Unix socket until interrupted."""
+    address = address or os.getenv("MODEL_HOST_SOCKET", DEFAULT_SOCKET)
+    # Check both before loading the models, so a bad setup fails fast
+    authkey = _get_authkey()
+    ensure_private_socket_dir(address)
+
+    # Import here so API workers using ModelHostClient never load the models
+    from services.text_vectorization_service import get_text_vectors
+    from services.image_captioning_service import DECODING_PROFILES, DEFAULT_DECODING_PROFILE, caption_images
+
+    max_wait = float(os.getenv("MODEL_HOST_BATCH_WAIT_MS", "5")) / 1000
+    batcher = Batcher(
+        get_text_vectors,
+        max_batch=int(os.getenv("MODEL_HOST_MAX_BATCH", "64")),
+        max_wait=max_wait,
+        name="text-batcher",
+    )
+
+    def caption_batch(profile):
+        def run_batch(pixels):
+            return [caption for caption, _ in caption_images([Image.fromarray(p) for p in pixels], profile)]
+        return run_batch
+
+    # Only images with the same decoding settings can share a generate() call
+    caption_batchers = {
+        profile: Batcher(
+            caption_batch(profile),
+            max_batch=int(os.getenv("MODEL_HOST_CAPTION_MAX_BATCH", "8")),
+            max_wait=max_wait,
+            name=f"caption-batcher-{profile}",
+        )
+        for profile in DECODING_PROFILES
+    }
+
+    def handle(conn):
+        with conn:
+            while True:
+                try:
+                    op, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                try:
+                    if op == "vectorize":
+                        result = batcher.submit(args[0]).result()
+                    elif op == "caption":
+                        pixels, profile = args
+                        profile = profile or DEFAULT_DECODING_PROFILE
+                        if profile not in caption_batchers:
+                            raise ValueError(f"Unknown decoding profile '{profile}'")
+                        result = caption_batchers[profile].submit([pixels]).result()[0]
+                    elif op == "ping":
+                        result = "pong"
+                    else:
+                        raise ValueError(f"Unknown operation '{op}'")
+                    reply = ("ok", result)
+                except Exception as e:
+                    print(f"❌ Model host error in '{op}': {e}")
+                    reply = ("error", str(e))
+
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    return
+
+    if os.path.exists(address):
+        os.unlink(address)
+
+    with Listener(address, family="AF_UNIX", authkey=authkey) as listener:
+        print(f"✅ Model host listening on {address}")
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    # Failed handshakes (e.g. wrong authkey) shouldn't stop the host
+                    print(f"❌ Model host rejected a connection: {e}")
+                    continue
+                threading.Thread(target=handle, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            print("Model host shutting down")
+
+
+if __name__ == "__main__":
+    serve()
@@ -8,6 +8,9 @@ from utils.s3_utils import generate_signed_urls
 # Load environment variables
 load_dotenv()
 
+# URLs are signed in one batch (see utils.s3_utils), so large requests stay cheap
+MAX_UPLOAD_URLS = int(os.getenv("MAX_UPLOAD_URLS", "500"))
+
 class S3Service:
     def __init__(self):
         self.aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
@@ -39,8 +42,8 @@ class S3Service:
         if count <= 0:
             raise ValueError("Count must be a positive integer.")
 
-        if count > 10:
-            raise ValueError("Cannot request more than 10 URLs at a time.")
+        if count > MAX_UPLOAD_URLS:
+            raise ValueError(f"Cannot request more than {MAX_UPLOAD_URLS} URLs at a time.")
 
         # Generate object keys
         object_keys = []
@@ -1,6 +1,10 @@
 from transformers import AutoTokenizer, AutoModel
 import torch
 import torch.nn.functional as F
+import os
+from utils.inference import get_inference_dtype, PinnedInputStager
+from utils.preprocessing import TokenCache
+from utils.timing import StageTimer
 
 # Check for GPU availability
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -10,22 +14,66 @@ if torch.cuda.is_available():
     print(f"GPU Memory: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
 
 # Load model and tokenizer once at module level for efficiency
-tokenizer = AutoTokenizer.from_pretrained('sentence-transformers/all-MiniLM-L6-v2')
+tokenizer = AutoTokenizer.from_pretrained('sentence-transformers/all-MiniLM-L6-v2', use_fast=True)
 model = AutoModel.from_pretrained('sentence-transformers/all-MiniLM-L6-v2')
 
-# Move model to GPU if available
-model = model.to(device)
-print(f"✅ Text Vectorization model loaded and moved to {device}")
+# Move model to GPU if available, in half precision there (fp32 on CPU)
+inference_dtype = get_inference_dtype(device)
+model = model.to(device, dtype=inference_dtype)
+print(f"✅ Text Vectorization model loaded and moved to {device} ({inference_dtype})")
+
+# Stages token tensors through pinned host buffers for non-blocking copies
+input_stager = PinnedInputStager(device, dtype=inference_dtype)
+
+# Memoized token ids for repeated phrases, tokenized in batches by the Rust tokenizer
+token_cache = TokenCache(tokenizer, maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "4096")))
 
 # Enable evaluation mode for inference
 model.eval()
 
 #Mean Pooling - Take attention mask into account for correct averaging
 def mean_pooling(model_output, attention_mask):
-    token_embeddings = model_output[0] #First element of model_output contains all token embeddings
+    token_embeddings = model_output[0].float() #First element of model_output contains all token embeddings (pooled in fp32)
     input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
     return torch.sum(token_embeddings * input_mask_expanded, 1) / torch.clamp(input_mask_expanded.sum(1), min=1e-9)
 
+def get_text_vectors(texts):
+    """
+    Convert a batch of texts into vector representations using sentence transformers.
+
+    Args:
+        texts (list[str]): Input texts to be vectorized
+
+    Returns:
+        numpy.ndarray: Matrix of shape (len(texts), embedding size), one row per text
+    """
+    timer = StageTimer(device)
+
+    # Tokenize text (cached ids for phrases seen before)
+    with timer.stage("tokenize"):
+        encoded_input = token_cache.encode(list(texts))
+
+    # Move inputs to the same device as the model
+    with timer.stage("transfer"):
+        encoded_input = input_stager.to_device(encoded_input)
+
+    # Compute token embeddings
+    with timer.stage("encode"), torch.no_grad():
+        model_output = model(**encoded_input)
+
+    with timer.stage("pool"):
+        # Perform pooling
+        sentence_embeddings = mean_pooling(model_output, encoded_input['attention_mask'])
+
+        # Normalize embeddings
+        sentence_embeddings = F.normalize(sentence_embeddings, p=2, dim=1)
+
+        # Convert to numpy array and return (move back to CPU for numpy conversion)
+        vectors = sentence_embeddings.cpu().numpy()
+
+    timer.report("Text vectorization")
+    return vectors
+
 def get_text_vector(text):
     """
     Convert input text into a vector representation using sentence transformers.
@@ -36,24 +84,7 @@ def get_text_vector(text):
     Returns:
         numpy.ndarray: Vector representation of the input text
     """
-    # Tokenize text
-    encoded_input = tokenizer([text], padding=True, truncation=True, return_tensors='pt')
-    
-    # Move inputs to the same device as the model
-    encoded_input = {k: v.to(device) for k, v in encoded_input.items()}
-    
-    # Compute token embeddings
-    with torch.no_grad():
-        model_output = model(**encoded_input)
-    
-    # Perform pooling
-    sentence_embeddings = mean_pooling(model_output, encoded_input['attention_mask'])
-    
-    # Normalize embeddings
-    sentence_embeddings = F.normalize(sentence_embeddings, p=2, dim=1)
-    
-    # Convert to numpy array and return (move back to CPU for numpy conversion)
-    return sentence_embeddings[0].cpu().numpy()
+    return get_text_vectors([text])[0]
 
 # # Example usage
 # if __name__ == "__main__":
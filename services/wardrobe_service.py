@@ -4,10 +4,21 @@ import os
 import uuid
 import numpy as np
 from utils.s3_utils import generate_signed_urls
-from services.text_vectorization_service import get_text_vector
+from utils.image_derivatives import derivative_url
+from services.derivative_service import ensure_derivatives
+from services.model_host import get_model_host_client
+from starlette.concurrency import run_in_threadpool
 # Load environment variables
 load_dotenv()
 
+# In multi-worker mode the model host owns the weights; otherwise load them here
+model_host = get_model_host_client()
+if model_host:
+    get_text_vector = model_host.get_text_vector
+    get_text_vectors = model_host.get_text_vectors
+else:
+    from services.text_vectorization_service import get_text_vector, get_text_vectors
+
 # Connect to MongoDB
 MONGO_URL = os.getenv("MONGO_URL")
 HUGGINGFACE_API_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN")
@@ -35,10 +46,10 @@ def flatten_recommendations(category_results):
                 if isinstance(items, list):
                     for item in items:
                         if isinstance(item, dict):
-                            # Add category to each item
-                            item_with_category = item.copy()
-                            item_with_category["category"] = category
-                            flat_recommendations.append(item_with_category)
+                            # Add category to each item (in place: the documents are
+                            # fresh query results owned by this request, no need to copy)
+                            item["category"] = category
+                            flat_recommendations.append(item)
     
     return flat_recommendations
 
@@ -47,10 +58,13 @@ def add_wardrobe_item(user_id: str, image_url: str, caption: str, category: str)
     caption_embedding = get_text_vector(caption)
     if caption_embedding is not None and isinstance(caption_embedding, np.ndarray):
         caption_embedding = caption_embedding.tolist()
+    # Listing thumbnail next to the original (no-op if captioning already created it)
+    thumbnail_url = derivative_url(image_url, "thumb") if ensure_derivatives(image_url) else None
     item = {
         "_id": item_id,
         "user_id": user_id,
         "image_url": image_url,  
+        "thumbnail_url": thumbnail_url,
         "caption": caption,
         "caption_embedding": caption_embedding,
         "category": category
@@ -65,16 +79,20 @@ def get_user_wardrobe(user_id: str):
     for item in wardrobe_items:
         item["_id"] = str(item["_id"])
     
-    # Collect all image URLs
-    image_urls = [item["image_url"] for item in wardrobe_items]
+    # Collect all image URLs, serving the thumbnail where one exists and
+    # keeping the original available as original_image_url
+    image_urls = [item.get("thumbnail_url") or item["image_url"] for item in wardrobe_items]
+    original_urls = [item["image_url"] for item in wardrobe_items]
     
     # Generate signed URLs for all images at once
     if image_urls:
-        signed_urls = generate_signed_urls(urls=image_urls, client_method='get_object')
+        signed_urls = generate_signed_urls(urls=image_urls + original_urls, client_method='get_object')
         
         # Update items with signed URLs
         for i, item in enumerate(wardrobe_items):
             item["image_url"] = signed_urls[i]
+            item["original_image_url"] = signed_urls[len(wardrobe_items) + i]
+            item.pop("thumbnail_url", None)
     
     return wardrobe_items
 
@@ -92,7 +110,13 @@ async def get_wardrobe_recs(input_caption, user_id: str):
     
 async def get_embedding_from_huggingface(input_caption):
     try:
-        return get_text_vector(input_caption)
+        return await run_in_threadpool(get_text_vector, input_caption)
+    except Exception as err:
+        print(err)
+
+async def get_embeddings_from_huggingface(input_captions):
+    try:
+        return await run_in_threadpool(get_text_vectors, input_captions)
     except Exception as err:
         print(err)
 
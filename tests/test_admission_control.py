@@ -0,0 +1,150 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.admission_control import AdmissionControlMiddleware, ConcurrencyLimiter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_sheds_once_queue_is_full():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, max_queue=1, queue_timeout=5)
+        assert await limiter.acquire()
+
+        queued = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+
+        # Queue is full: shed immediately instead of waiting
+        assert not await limiter.acquire()
+
+        limiter.release(0.1)
+        assert await queued
+        assert limiter.in_flight == 1 and limiter.queued == 0
+
+        limiter.release(0.1)
+        assert limiter.in_flight == 0
+
+    run(scenario())
+
+
+def test_waiter_timeout_leaves_no_slot_behind():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, max_queue=4, queue_timeout=0.05)
+        assert await limiter.acquire()
+        assert not await limiter.acquire()
+        assert limiter.queued == 0
+
+        limiter.release(0.1)
+        assert limiter.in_flight == 0
+        assert await limiter.acquire()
+
+    run(scenario())
+
+
+def test_cancelled_waiter_leaves_no_slot_behind():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, max_queue=4, queue_timeout=5)
+        assert await limiter.acquire()
+
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert limiter.queued == 0
+
+        limiter.release(0.1)
+        assert limiter.in_flight == 0
+
+    run(scenario())
+
+
+def test_slot_handed_to_cancelled_waiter_is_returned():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, max_queue=4, queue_timeout=5)
+        assert await limiter.acquire()
+
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        # Hand the slot over and cancel before the waiter gets to run
+        limiter.release(0.1)
+        waiter.cancel()
+        outcome, = await asyncio.gather(waiter, return_exceptions=True)
+        if outcome is True:
+            # Some Python versions deliver the slot despite the cancel; then the waiter owns it
+            limiter.release(0.1)
+
+        assert limiter.in_flight == 0
+        assert await limiter.acquire()
+
+    run(scenario())
+
+
+def test_adaptive_limit_stays_within_bounds(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr("utils.admission_control.time.monotonic", lambda: clock["now"])
+
+    limiter = ConcurrencyLimiter(limit=4, max_queue=0, adaptive=True, min_limit=2, max_limit=6, target_latency=1.0)
+
+    # Fast, saturated completions grow the limit up to max_limit and no further
+    for _ in range(500):
+        limiter._in_flight = limiter.limit + 1
+        limiter.release(0.1)
+        assert limiter.min_limit <= limiter.limit <= limiter.max_limit
+    assert limiter.limit == 6
+
+    # Slow completions shrink it, at most once per target latency window, down to min_limit
+    limiter._in_flight = 1
+    limiter.release(5.0)
+    limiter._in_flight = 1
+    limiter.release(5.0)
+    assert limiter.limit == 4
+
+    for _ in range(50):
+        clock["now"] += 1.0
+        limiter._in_flight = 1
+        limiter.release(5.0, overloaded=True)
+        assert limiter.min_limit <= limiter.limit <= limiter.max_limit
+    assert limiter.limit == 2
+
+
+def test_ceiling_never_below_starting_limit():
+    limiter = ConcurrencyLimiter(limit=8, max_queue=0, adaptive=True, max_limit=4)
+    assert limiter.max_limit == 8
+
+
+def _app(limiter):
+    app = FastAPI()
+    app.add_middleware(AdmissionControlMiddleware, limiters={"/work": limiter})
+
+    @app.get("/work")
+    async def work(delay: float = 0):
+        await asyncio.sleep(delay)
+        return {"ok": True}
+
+    return app
+
+
+def test_middleware_rejects_with_retry_after():
+    limiter = ConcurrencyLimiter(limit=1, max_queue=0)
+    limiter._in_flight = 1
+
+    response = TestClient(_app(limiter)).get("/work")
+
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+
+
+def test_middleware_times_out_and_frees_slot():
+    limiter = ConcurrencyLimiter(limit=1, max_queue=0, request_timeout=0.05)
+    client = TestClient(_app(limiter))
+
+    response = client.get("/work", params={"delay": 1})
+    assert response.status_code == 504
+    assert limiter.in_flight == 0
+
+    assert client.get("/work").status_code == 200
@@ -0,0 +1,33 @@
+import io
+
+from PIL import Image
+
+from utils.image_derivatives import derivative_key, is_derivative_key, render_derivatives
+
+
+def _jpeg(size):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "blue").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_derivative_keys():
+    assert derivative_key("Recommendations/abc.png", "caption") == "Recommendations/abc_caption.jpg"
+    assert is_derivative_key("Recommendations/abc_caption.jpg")
+    assert is_derivative_key("Recommendations/abc_thumb.jpg")
+    assert not is_derivative_key("Recommendations/abc.jpg")
+    assert not is_derivative_key("Recommendations/caption.jpg")
+
+
+def test_render_sizes():
+    rendered = render_derivatives(_jpeg((1200, 800)))
+
+    assert Image.open(io.BytesIO(rendered["caption"])).size == (576, 384)
+    assert Image.open(io.BytesIO(rendered["thumb"])).size == (256, 171)
+
+
+def test_small_originals_are_not_upsampled():
+    rendered = render_derivatives(_jpeg((300, 200)))
+
+    assert Image.open(io.BytesIO(rendered["caption"])).size == (300, 200)
+    assert Image.open(io.BytesIO(rendered["thumb"])).size == (256, 171)
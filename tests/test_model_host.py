@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from services.model_host import Batcher
+
+
+def test_batches_requests_and_splits_results():
+    batches = []
+
+    def run_batch(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = Batcher(run_batch, max_batch=8, max_wait=0.5)
+    futures = [batcher.submit([1]), batcher.submit([2, 3]), batcher.submit([4])]
+
+    assert [future.result(5) for future in futures] == [[10], [20, 30], [40]]
+    assert batches == [[1, 2, 3, 4]]
+
+
+def test_batch_respects_max_batch():
+    release = threading.Event()
+    sizes = []
+
+    def run_batch(items):
+        release.wait(5)
+        sizes.append(len(items))
+        return items
+
+    batcher = Batcher(run_batch, max_batch=2, max_wait=0.05)
+    futures = [batcher.submit([i]) for i in range(5)]
+    release.set()
+
+    assert [future.result(5) for future in futures] == [[i] for i in range(5)]
+    assert max(sizes) <= 2
+
+
+def test_errors_fail_every_request_in_the_batch():
+    def run_batch(items):
+        raise RuntimeError("boom")
+
+    batcher = Batcher(run_batch, max_batch=4, max_wait=0.01)
+    with pytest.raises(RuntimeError):
+        batcher.submit([1]).result(5)
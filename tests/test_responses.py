@@ -0,0 +1,41 @@
+import base64
+
+import numpy as np
+import orjson
+from starlette.requests import Request
+
+from utils.responses import vector_response
+
+
+def _request(accept=None):
+    headers = [(b"accept", accept.encode())] if accept else []
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": headers})
+
+
+VECTORS = np.arange(6, dtype=np.float32).reshape(2, 3)
+
+
+def test_octet_stream_when_ranked_above_json():
+    response = vector_response("vectors", VECTORS, _request("application/octet-stream, application/json;q=0.5"))
+
+    assert response.media_type == "application/octet-stream"
+    assert response.headers["vary"] == "Accept"
+    assert response.headers["x-vector-shape"] == "2,3"
+    assert np.array_equal(np.frombuffer(response.body, dtype="<f4").reshape(2, 3), VECTORS)
+
+
+def test_json_when_octet_stream_not_preferred():
+    response = vector_response("vectors", VECTORS, _request("application/octet-stream;q=0.5, application/json"))
+
+    assert response.media_type == "application/json"
+    assert response.headers["vary"] == "Accept"
+    assert orjson.loads(response.body) == {"vectors": VECTORS.tolist()}
+
+
+def test_base64_encoding():
+    response = vector_response("vector", VECTORS[0], _request(), encoding="base64")
+
+    body = orjson.loads(response.body)
+    assert response.headers["vary"] == "Accept"
+    assert body["shape"] == [3]
+    assert np.array_equal(np.frombuffer(base64.b64decode(body["vector"]), dtype="<f4"), VECTORS[0])
@@ -0,0 +1,269 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from fastapi.responses import JSONResponse
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+class ConcurrencyLimiter:
+    """
+    Per-route concurrency limit with a bounded FIFO wait queue.
+
+    Requests beyond `limit` wait in the queue; once the queue holds `max_queue`
+    waiters (or a waiter exceeds `queue_timeout` seconds) the request is rejected
+    so the caller can shed it immediately instead of letting it time out upstream.
+
+    With `adaptive=True` the limit is tuned AIMD-style from observed latency:
+    it grows by roughly one slot per window of fast, saturated completions and
+    is cut multiplicatively when latency exceeds `target_latency`.
+
+    `request_timeout` (seconds, None to disable) bounds how long an admitted
+    request may hold its slot; the middleware answers 504 when it runs out.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        max_queue: int,
+        queue_timeout: float = 10.0,
+        adaptive: bool = False,
+        min_limit: int = 1,
+        max_limit: Optional[int] = None,
+        target_latency: float = 2.0,
+        backoff: float = 0.7,
+        request_timeout: Optional[float] = None,
+    ):
+        if limit <= 0:
+            raise ValueError("limit must be a positive integer.")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative.")
+
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.adaptive = adaptive
+        self.min_limit = max(1, min_limit)
+        # Never below the starting limit, or the first additive increase would cut it
+        self.max_limit = max(limit, max_limit or limit * 4)
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.request_timeout = request_timeout or None
+
+        self._limit = float(limit)
+        self._in_flight = 0
+        self._waiters = deque()
+        self._avg_latency = None
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if needed. Returns False if the request should be shed."""
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands the slot over by resolving the future
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just as we timed out; give it back
+                self._release_slot()
+            else:
+                waiter.cancel()
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self, latency: float, overloaded: bool = False):
+        """Free a slot and feed the observed latency into the adaptive limit."""
+        self._record_latency(latency, overloaded)
+        self._release_slot()
+
+    def retry_after(self) -> int:
+        """Rough seconds until a new request could be admitted, for the Retry-After header."""
+        avg_latency = self._avg_latency or self.target_latency
+        waves = (len(self._waiters) + 1) / self.limit
+        return max(1, math.ceil(avg_latency * waves))
+
+    def _release_slot(self):
+        self._in_flight -= 1
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(True)
+
+    def _record_latency(self, latency: float, overloaded: bool):
+        if self._avg_latency is None:
+            self._avg_latency = latency
+        else:
+            self._avg_latency = 0.8 * self._avg_latency + 0.2 * latency
+
+        if not self.adaptive:
+            return
+
+        now = time.monotonic()
+        if overloaded or latency > self.target_latency:
+            # Multiplicative decrease, at most once per target latency window so a
+            # single burst of slow requests doesn't collapse the limit to the floor
+            if now - self._last_decrease >= self.target_latency:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                self._last_decrease = now
+        elif self._in_flight >= self.limit:
+            # Additive increase only while saturated: +1 slot per `limit` completions
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that applies a ConcurrencyLimiter to each configured route prefix.
+
+    Shed requests get `reject_status` (503 by default) with a Retry-After header so
+    clients and the autoscaler see back-pressure right away. Admitted requests
+    that outlive the limiter's `request_timeout` get 504 and give their slot back.
+    """
+
+    def __init__(self, app, limiters: Dict[str, ConcurrencyLimiter], reject_status: int = 503):
+        self.app = app
+        self.reject_status = reject_status
+        # Longest prefix first, so a more specific route wins over a shorter prefix
+        self.limiters = sorted(limiters.items(), key=lambda kv: len(kv[0]), reverse=True)
+
+    def _match(self, path: str) -> Optional[ConcurrencyLimiter]:
+        for prefix, limiter in self.limiters:
+            if path.startswith(prefix):
+                return limiter
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self._match(scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            print(f"⚠️ Shedding request to {scope['path']} (in flight: {limiter.in_flight}, queued: {limiter.queued}, limit: {limiter.limit})")
+            response = JSONResponse(
+                status_code=self.reject_status,
+                content={"error": "Server is busy, please retry later."},
+                headers={"Retry-After": str(limiter.retry_after())},
+            )
+            await response(scope, receive, send)
+            return
+
+        status = {"code": 200, "started": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                status["started"] = True
+            await send(message)
+
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self.app(scope, receive, send_wrapper), timeout=limiter.request_timeout)
+        except asyncio.TimeoutError:
+            # Work already handed to a thread keeps running, but the slot is freed
+            # so a handful of stuck requests can't lock the route up
+            print(f"⏱️ Request to {scope['path']} exceeded {limiter.request_timeout}s")
+            if status["started"]:
+                raise
+            status["code"] = 504
+            response = JSONResponse(status_code=504, content={"error": "Request timed out."})
+            await response(scope, receive, send)
+        except Exception:
+            status["code"] = 500
+            raise
+        finally:
+            limiter.release(time.monotonic() - start, overloaded=status["code"] in (429, 503, 504))
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def build_limiters_from_env() -> Dict[str, ConcurrencyLimiter]:
+    """
+    Build the per-route limiters for the GPU-bound endpoints from environment variables.
+
+    CAPTION_* settings apply to /api/caption, VECTORIZE_* to /api/wardrobe/vectorize
+    (including /vectorize/batch) and MATCH_* to /api/wardrobe/match. Each route has
+    its own limit and target latency, so slow /match calls never throttle /vectorize.
+    ADMISSION_ADAPTIVE=true enables latency-driven limit tuning for all of them.
+    *_REQUEST_TIMEOUT caps how long an admitted request may run (0 disables).
+    """
+    adaptive = os.getenv("ADMISSION_ADAPTIVE", "false").lower() in ("1", "true", "yes")
+    queue_timeout = _env_float("ADMISSION_QUEUE_TIMEOUT", 10.0)
+
+    return {
+        "/api/caption": ConcurrencyLimiter(
+            limit=_env_int("CAPTION_MAX_CONCURRENCY", 4),
+            max_queue=_env_int("CAPTION_MAX_QUEUE", 16),
+            queue_timeout=queue_timeout,
+            adaptive=adaptive,
+            max_limit=_env_int("CAPTION_MAX_CONCURRENCY_CEILING", 16),
+            target_latency=_env_float("CAPTION_TARGET_LATENCY", 2.0),
+            request_timeout=_env_float("CAPTION_REQUEST_TIMEOUT", 30.0),
+        ),
+        "/api/wardrobe/vectorize": ConcurrencyLimiter(
+            limit=_env_int("VECTORIZE_MAX_CONCURRENCY", 16),
+            max_queue=_env_int("VECTORIZE_MAX_QUEUE", 64),
+            queue_timeout=queue_timeout,
+            adaptive=adaptive,
+            max_limit=_env_int("VECTORIZE_MAX_CONCURRENCY_CEILING", 64),
+            target_latency=_env_float("VECTORIZE_TARGET_LATENCY", 0.5),
+            request_timeout=_env_float("VECTORIZE_REQUEST_TIMEOUT", 10.0),
+        ),
+        "/api/wardrobe/match": ConcurrencyLimiter(
+            limit=_env_int("MATCH_MAX_CONCURRENCY", 8),
+            max_queue=_env_int("MATCH_MAX_QUEUE", 32),
+            queue_timeout=queue_timeout,
+            adaptive=adaptive,
+            max_limit=_env_int("MATCH_MAX_CONCURRENCY_CEILING", 32),
+            target_latency=_env_float("MATCH_TARGET_LATENCY", 3.0),
+            request_timeout=_env_float("MATCH_REQUEST_TIMEOUT", 30.0),
+        ),
+    }
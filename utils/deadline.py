@@ -0,0 +1,30 @@
+import time
+from typing import Iterable
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work bounded by a monotonic deadline runs past it."""
+
+
+def remaining(deadline: float) -> float:
+    """Seconds left until `deadline` (a time.monotonic() value); raises once it has passed."""
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("Deadline exceeded")
+    return left
+
+
+def read_with_deadline(chunks: Iterable[bytes], deadline: float, what: str = "download") -> bytes:
+    """
+    Join a stream of chunks, giving up once `deadline` passes.
+
+    Socket timeouts only bound each individual read, so a server trickling a
+    byte at a time could otherwise hold the caller forever.
+    """
+    parts = []
+    for chunk in chunks:
+        if time.monotonic() > deadline:
+            raise DeadlineExceeded(f"{what} did not finish in time")
+        if chunk:
+            parts.append(chunk)
+    return b"".join(parts)
@@ -0,0 +1,92 @@
+import io
+import os
+from typing import Dict, Tuple
+from urllib.parse import urlparse, urlunparse
+
+from PIL import Image, ImageOps
+
+# variant name -> (mode, size in px)
+#   "cover": shorter side scaled down to `size` (BLIP resizes to 384x384, so it never upsamples)
+#   "fit":   whole image fits in a `size` x `size` box (wardrobe listing thumbnail)
+DERIVATIVE_VARIANTS: Dict[str, Tuple[str, int]] = {
+    "caption": ("cover", 384),
+    "thumb": ("fit", 256),
+}
+
+JPEG_QUALITY = 85
+
+
+def derivative_key(object_key: str, variant: str) -> str:
+    """Key of a derivative stored next to its original: Recommendations/<id>.jpg -> Recommendations/<id>_<variant>.jpg"""
+    root, _ = os.path.splitext(object_key)
+    return f"{root}_{variant}.jpg"
+
+
+def derivative_url(url: str, variant: str) -> str:
+    """Same as derivative_key, for a full (unsigned) S3 object URL."""
+    parsed = urlparse(url)
+    return urlunparse(parsed._replace(path=derivative_key(parsed.path, variant)))
+
+
+def _target_size(image_size: Tuple[int, int], mode: str, size: int) -> Tuple[int, int]:
+    width, height = image_size
+    if mode == "cover":
+        scale = size / min(width, height)
+    else:
+        scale = size / max(width, height)
+    if scale >= 1:
+        return width, height
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def is_derivative_key(object_key: str) -> bool:
+    """True for keys that are already a derivative (Recommendations/<id>_caption.jpg), which get no derivatives of their own."""
+    root, _ = os.path.splitext(object_key)
+    return any(root.endswith(f"_{variant}") for variant in DERIVATIVE_VARIANTS)
+
+
+def open_original(image_bytes: bytes, variants: Dict[str, Tuple[str, int]] = None) -> Image.Image:
+    """
+    Decode an original as upright RGB, only as large as the variants need.
+
+    JPEGs are decoded with draft() at the smallest DCT scale that still covers
+    the largest variant, which skips most of the full-size decode work.
+    """
+    variants = variants or DERIVATIVE_VARIANTS
+    image = Image.open(io.BytesIO(image_bytes))
+    largest = max(size for _, size in variants.values())
+    image.draft("RGB", (largest, largest))
+    return ImageOps.exif_transpose(image).convert("RGB")
+
+
+def resize_variants(image: Image.Image, variants: Dict[str, Tuple[str, int]] = None) -> Dict[str, Image.Image]:
+    """Resize a decoded original to every variant."""
+    variants = variants or DERIVATIVE_VARIANTS
+
+    # Largest first, so each variant is resized from the previous (smaller) one
+    # whenever that still covers it
+    resized = {}
+    current = image
+    for name, (mode, size) in sorted(variants.items(), key=lambda kv: kv[1][1], reverse=True):
+        target = _target_size(image.size, mode, size)
+        source = current if current.width >= target[0] and current.height >= target[1] else image
+        current = source if source.size == target else source.resize(target, Image.Resampling.LANCZOS)
+        resized[name] = current
+    return resized
+
+
+def encode_jpeg(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def render_derivatives(image_bytes: bytes, variants: Dict[str, Tuple[str, int]] = None) -> Dict[str, bytes]:
+    """
+    Decode an original image once and render every derivative as JPEG bytes.
+
+    Runs in-process on the derivative I/O threads (PIL releases the GIL while
+    it works).
+    """
+    resized = resize_variants(open_original(image_bytes, variants), variants)
+    return {name: encode_jpeg(image) for name, image in resized.items()}
@@ -0,0 +1,132 @@
+import itertools
+import os
+import threading
+from typing import Dict
+
+import torch
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+_DTYPES = {
+    "fp32": torch.float32,
+    "fp16": torch.float16,
+    "bf16": torch.bfloat16,
+}
+
+
+def get_inference_dtype(device: torch.device) -> torch.dtype:
+    """
+    Pick the weight/activation dtype for inference from INFERENCE_DTYPE (auto, fp32, fp16, bf16).
+
+    "auto" uses fp16 on CUDA and fp32 everywhere else. Half precision is never
+    used on CPU, so CPU-only machines always fall back to the fp32 path.
+    """
+    requested = os.getenv("INFERENCE_DTYPE", "auto").lower()
+    if device.type != "cuda":
+        if requested not in ("auto", "fp32"):
+            print(f"❌ Warning: INFERENCE_DTYPE={requested} is only supported on CUDA, using fp32 on {device}.")
+        return torch.float32
+
+    if requested == "auto":
+        return torch.float16
+    if requested not in _DTYPES:
+        print(f"❌ Warning: Unknown INFERENCE_DTYPE '{requested}', using fp16.")
+        return torch.float16
+    if requested == "bf16" and not torch.cuda.is_bf16_supported():
+        print("❌ Warning: bf16 is not supported on this GPU, using fp16.")
+        return torch.float16
+    return _DTYPES[requested]
+
+
+class _StagingSlot:
+    """One set of pinned host buffers plus the event marking its last copy as finished."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buffers: Dict[str, torch.Tensor] = {}
+        self.copy_done = None
+
+
+class PinnedInputStager:
+    """
+    Moves model inputs to the device through reusable pinned host buffers.
+
+    On CUDA each input tensor is copied into a preallocated page-locked buffer
+    (cast to `dtype` on the host for floating point tensors, which also halves
+    the transfer for fp16/bf16) and sent with a non-blocking copy on a dedicated
+    copy stream, so the transfer overlaps compute already queued on the compute
+    stream. On CPU inputs are only cast, so the same call sites work unchanged
+    on CPU-only machines.
+
+    The buffers form a ring of `slots` (INFERENCE_PINNED_SLOTS) sets, each with
+    its own lock and copy event. A request only waits for the previous transfer
+    out of the slot it reuses, never for compute, so concurrent threadpool
+    workers can stage inputs while the GPU is busy.
+    """
+
+    def __init__(self, device: torch.device, dtype: torch.dtype = torch.float32, slots: int = None):
+        self.device = device
+        self.dtype = dtype
+        self.enabled = device.type == "cuda"
+        self.stream = torch.cuda.Stream(device=device) if self.enabled else None
+
+        if slots is None:
+            slots = int(os.getenv("INFERENCE_PINNED_SLOTS", "4"))
+        self._slots = [_StagingSlot() for _ in range(max(1, slots))]
+        self._next_slot = itertools.count()
+
+    def _target_dtype(self, tensor: torch.Tensor) -> torch.dtype:
+        return self.dtype if tensor.is_floating_point() else tensor.dtype
+
+    def _buffer(self, slot: _StagingSlot, name: str, tensor: torch.Tensor) -> torch.Tensor:
+        dtype = self._target_dtype(tensor)
+        buffer = slot.buffers.get(name)
+        if buffer is None or buffer.dtype != dtype or buffer.numel() < tensor.numel():
+            buffer = torch.empty(tensor.numel(), dtype=dtype, pin_memory=True)
+            slot.buffers[name] = buffer
+        return buffer[:tensor.numel()].view(tensor.shape)
+
+    def _acquire_slot(self) -> _StagingSlot:
+        # Take the first free slot, starting round-robin; block only when all are busy
+        start = next(self._next_slot)
+        for offset in range(len(self._slots)):
+            slot = self._slots[(start + offset) % len(self._slots)]
+            if slot.lock.acquire(blocking=False):
+                return slot
+        slot = self._slots[start % len(self._slots)]
+        slot.lock.acquire()
+        return slot
+
+    def to_device(self, inputs: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        if not self.enabled:
+            return {k: v.to(self.device, dtype=self._target_dtype(v)) for k, v in inputs.items()}
+
+        slot = self._acquire_slot()
+        try:
+            # Don't overwrite this slot's buffers while its previous async copy may
+            # still read them. The event is on the copy stream, so this never waits on compute.
+            if slot.copy_done is not None:
+                slot.copy_done.synchronize()
+
+            staged = {}
+            for name, tensor in inputs.items():
+                host = self._buffer(slot, name, tensor)
+                host.copy_(tensor)
+                staged[name] = host
+
+            compute_stream = torch.cuda.current_stream(self.device)
+            with torch.cuda.stream(self.stream):
+                on_device = {k: v.to(self.device, non_blocking=True) for k, v in staged.items()}
+                slot.copy_done = torch.cuda.Event()
+                slot.copy_done.record(self.stream)
+        finally:
+            slot.lock.release()
+
+        # Compute must wait for the transfer, and the caching allocator must
+        # know the tensors are used on the compute stream
+        compute_stream.wait_stream(self.stream)
+        for tensor in on_device.values():
+            tensor.record_stream(compute_stream)
+        return on_device
@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+import torch
+from PIL import Image
+
+
+class TokenCache:
+    """
+    Batched tokenization with memoized token ids for repeated phrases.
+
+    Wardrobe phrases ("black leather jacket") repeat a lot, so token ids are kept
+    in an LRU cache and only unseen phrases go through the fast (Rust) tokenizer,
+    all in one batch call. Padded tensors are built directly from the cached ids.
+    """
+
+    def __init__(self, tokenizer, maxsize: int = 4096):
+        if not getattr(tokenizer, "is_fast", False):
+            print("❌ Warning: Tokenizer is not a fast (Rust) tokenizer; batch tokenization will be slower.")
+        self.tokenizer = tokenizer
+        self.maxsize = maxsize
+        self.pad_token_id = tokenizer.pad_token_id or 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, texts: List[str]) -> Dict[str, dict]:
+        found = {}
+        with self._lock:
+            for text in texts:
+                encoding = self._cache.get(text)
+                if encoding is not None:
+                    self._cache.move_to_end(text)
+                    found[text] = encoding
+        return found
+
+    def _store(self, encodings: Dict[str, dict]):
+        with self._lock:
+            for text, encoding in encodings.items():
+                self._cache[text] = encoding
+                self._cache.move_to_end(text)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def encode(self, texts: List[str]) -> Dict[str, torch.Tensor]:
+        """Tokenize `texts` into padded tensors, the same as tokenizer(texts, padding=True, truncation=True, return_tensors='pt')."""
+        encodings = self._lookup(texts)
+
+        missing = list(dict.fromkeys(text for text in texts if text not in encodings))
+        if missing:
+            batch = self.tokenizer(missing, truncation=True)
+            new_encodings = {
+                text: {key: batch[key][i] for key in batch.keys()}
+                for i, text in enumerate(missing)
+            }
+            self._store(new_encodings)
+            encodings.update(new_encodings)
+
+        rows = [encodings[text] for text in texts]
+        max_len = max(len(row["input_ids"]) for row in rows)
+
+        tensors = {}
+        for key in rows[0].keys():
+            pad_value = self.pad_token_id if key == "input_ids" else 0
+            tensor = torch.full((len(rows), max_len), pad_value, dtype=torch.long)
+            for i, row in enumerate(rows):
+                tensor[i, :len(row[key])] = torch.tensor(row[key], dtype=torch.long)
+            tensors[key] = tensor
+        return tensors
+
+
+class FastImagePreprocessor:
+    """
+    Vectorized replacement for BlipProcessor's image path.
+
+    The image is resized once with PIL on uint8 data and handed over as a uint8
+    tensor (a quarter of the bytes of float32 pixel values). Rescale and
+    normalization are folded into one multiply-add and applied on the model's
+    device by `normalize`, after the transfer.
+    """
+
+    def __init__(self, image_processor):
+        size = image_processor.size
+        self.height = size.get("height", size.get("shortest_edge"))
+        self.width = size.get("width", size.get("shortest_edge"))
+        self.resample = Image.Resampling(int(image_processor.resample))
+
+        mean = torch.tensor(image_processor.image_mean, dtype=torch.float32).view(1, 3, 1, 1)
+        std = torch.tensor(image_processor.image_std, dtype=torch.float32).view(1, 3, 1, 1)
+        rescale = image_processor.rescale_factor if image_processor.do_rescale else 1.0
+        # ((x * rescale) - mean) / std == x * scale + bias
+        self.scale = rescale / std
+        self.bias = -mean / std
+        self._device_constants = {}
+
+    def __call__(self, image: Image.Image) -> Dict[str, torch.Tensor]:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        if image.size != (self.width, self.height):
+            image = image.resize((self.width, self.height), resample=self.resample)
+
+        pixels = torch.from_numpy(np.asarray(image, dtype=np.uint8).copy())
+        return {"pixel_values": pixels.permute(2, 0, 1).unsqueeze(0).contiguous()}
+
+    def normalize(self, pixel_values: torch.Tensor, dtype: torch.dtype) -> torch.Tensor:
+        """Turn uint8 pixels (already on the target device) into normalized model inputs."""
+        device = pixel_values.device
+        constants = self._device_constants.get(device)
+        if constants is None:
+            constants = (self.scale.to(device), self.bias.to(device))
+            self._device_constants[device] = constants
+        scale, bias = constants
+        return torch.addcmul(bias, pixel_values.float(), scale).to(dtype)
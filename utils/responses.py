@@ -0,0 +1,93 @@
+import base64
+from typing import Optional
+
+import numpy as np
+import orjson
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+OCTET_STREAM = "application/octet-stream"
+
+
+class NumpyORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    NumPy arrays are serialized natively by orjson, so embeddings never have to
+    be turned into Python lists with .tolist() before they go out.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_numpy_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+def _numpy_default(obj):
+    # orjson only serializes C-contiguous arrays natively (slices/transposes aren't)
+    if isinstance(obj, np.ndarray):
+        return np.ascontiguousarray(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _accept_quality(accept: str, media_type: str) -> float:
+    """q-value the Accept header gives `media_type`, taken from its most specific matching range."""
+    main_type = media_type.split("/")[0]
+    best_specificity, best_quality = -1, 0.0
+    for media_range in accept.split(","):
+        parts = [part.strip() for part in media_range.split(";")]
+        range_type = parts[0].lower()
+        if range_type == media_type:
+            specificity = 2
+        elif range_type == f"{main_type}/*":
+            specificity = 1
+        elif range_type == "*/*":
+            specificity = 0
+        else:
+            continue
+
+        quality = 1.0
+        for param in parts[1:]:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if specificity > best_specificity:
+            best_specificity, best_quality = specificity, quality
+    return best_quality
+
+
+def wants_octet_stream(request: Request) -> bool:
+    """True only when the client ranks raw bytes strictly above JSON."""
+    accept = request.headers.get("accept", "")
+    if not accept:
+        return False
+    return _accept_quality(accept, OCTET_STREAM) > _accept_quality(accept, "application/json")
+
+
+def vector_response(key: str, vectors: np.ndarray, request: Request, encoding: Optional[str] = None) -> Response:
+    """
+    Return one vector or a packed matrix of vectors in the format the client asked for.
+
+    - Accept: application/octet-stream -> raw little-endian float32 bytes, shape in X-Vector-Shape
+    - encoding="base64"                -> {key: <base64 float32 bytes>, "dtype": "float32", "shape": [...]}
+    - default                          -> {key: [...]} serialized straight from the array by orjson
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="<f4")
+    shape = list(vectors.shape)
+    # The body depends on Accept, so caches must not serve one format for the other
+    headers = {"Vary": "Accept"}
+
+    if wants_octet_stream(request):
+        headers.update({"X-Vector-Shape": ",".join(str(dim) for dim in shape), "X-Vector-Dtype": "float32"})
+        return Response(content=vectors.tobytes(), media_type=OCTET_STREAM, headers=headers)
+
+    if encoding == "base64":
+        return NumpyORJSONResponse(content={
+            key: base64.b64encode(vectors.tobytes()).decode("ascii"),
+            "dtype": "float32",
+            "shape": shape,
+        }, headers=headers)
+
+    return NumpyORJSONResponse(content={key: vectors}, headers=headers)
@@ -1,7 +1,9 @@
 import boto3
+import hashlib
+import hmac
 import os
 from typing import List, Literal, Optional, Dict
-from urllib.parse import urlparse
+from urllib.parse import urlparse, parse_qs, quote
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -21,7 +23,13 @@ if all([aws_access_key_id, aws_secret_access_key, aws_region]):
             aws_access_key_id=aws_access_key_id,
             aws_secret_access_key=aws_secret_access_key,
             region_name=aws_region,
-            config=boto3.session.Config(signature_version='s3v4')
+            # Bounded socket timeouts: image downloads run while holding an admission slot
+            config=boto3.session.Config(
+                signature_version='s3v4',
+                connect_timeout=float(os.getenv("S3_CONNECT_TIMEOUT", "5")),
+                read_timeout=float(os.getenv("S3_READ_TIMEOUT", "10")),
+                retries={"max_attempts": 2}
+            )
         )
     except Exception as e:
         print(f"Error creating S3 client: {e}")
@@ -64,6 +72,95 @@ def extract_s3_object_key(url: str) -> Optional[Dict[str, str]]:
         print(f"Error parsing S3 URL: {e}")
         return None
 
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+def _presign_batch(
+    bucket_name: str,
+    object_keys: List[str],
+    client_method: str,
+    expiration: int,
+    content_types: List[str] = None
+) -> Optional[List[str]]:
+    """
+    Presign many URLs for one bucket with a single derived SigV4 signing key.
+
+    botocore rebuilds and signs a full request per URL, which dominates when
+    hundreds of URLs are issued at once. Here the first URL is generated by
+    botocore and used as the template (host, addressing style, date, credential
+    scope); the rest are signed with one HMAC each. If our signature for the
+    first key doesn't reproduce botocore's URL exactly, returns None so the
+    caller falls back to per-key botocore signing.
+    """
+    http_method = 'PUT' if client_method == 'put_object' else 'GET'
+    with_content_type = client_method == 'put_object' and content_types is not None
+    if with_content_type and len(content_types) < len(object_keys):
+        return None
+
+    def params_for(i):
+        params = {'Bucket': bucket_name, 'Key': object_keys[i]}
+        if with_content_type:
+            params['ContentType'] = content_types[i]
+        return params
+
+    try:
+        reference = s3_client.generate_presigned_url(
+            ClientMethod=client_method,
+            Params=params_for(0),
+            ExpiresIn=expiration,
+            HttpMethod=http_method
+        )
+    except Exception as e:
+        print(f"Error generating presigned URL for key {object_keys[0]}: {e}")
+        return None
+
+    parsed = urlparse(reference)
+    query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+    expected_headers = "content-type;host" if with_content_type else "host"
+    if query.get("X-Amz-Algorithm") != "AWS4-HMAC-SHA256" or query.get("X-Amz-SignedHeaders") != expected_headers:
+        return None
+    if "X-Amz-Security-Token" in query:
+        return None
+
+    # Virtual-hosted (/<key>) or path-style (/<bucket>/<key>) addressing
+    quoted_key = quote(object_keys[0], safe="/~")
+    if parsed.path == f"/{quoted_key}":
+        path_prefix = ""
+    elif parsed.path == f"/{bucket_name}/{quoted_key}":
+        path_prefix = f"/{bucket_name}"
+    else:
+        return None
+
+    amz_date = query["X-Amz-Date"]
+    scope = query["X-Amz-Credential"].split("/", 1)[1]
+    date_stamp, region, service, _ = scope.split("/")
+    signing_key = _hmac(_hmac(_hmac(_hmac(f"AWS4{aws_secret_access_key}".encode("utf-8"), date_stamp), region), service), "aws4_request")
+
+    canonical_query = "&".join(
+        f"{name}={quote(query[name], safe='-_.~')}"
+        for name in ("X-Amz-Algorithm", "X-Amz-Credential", "X-Amz-Date", "X-Amz-Expires", "X-Amz-SignedHeaders")
+    )
+
+    urls = []
+    for i, key in enumerate(object_keys):
+        canonical_uri = f"{path_prefix}/{quote(key, safe='/~')}"
+        canonical_headers = f"host:{parsed.netloc}\n"
+        if with_content_type:
+            canonical_headers = f"content-type:{content_types[i].strip()}\n" + canonical_headers
+        canonical_request = "\n".join([
+            http_method, canonical_uri, canonical_query, canonical_headers, expected_headers, "UNSIGNED-PAYLOAD"
+        ])
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+        ])
+        signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+        urls.append(f"{parsed.scheme}://{parsed.netloc}{canonical_uri}?{canonical_query}&X-Amz-Signature={signature}")
+
+    if urls[0] != reference:
+        print("Warning: Batched URL signing does not match botocore, falling back to per-key signing.")
+        return None
+    return urls
+
 def generate_signed_urls(
     urls: List[str] = None, 
     object_keys: List[str] = None,
@@ -99,6 +196,11 @@ def generate_signed_urls(
     
     # If object_keys provided, use them directly
     if object_keys:
+        if len(object_keys) > 1:
+            batch_urls = _presign_batch(bucket_name, object_keys, client_method, expiration, content_types)
+            if batch_urls is not None:
+                return batch_urls
+
         for i, key in enumerate(object_keys):
             params = {
                 'Bucket': bucket_name,
@@ -123,6 +225,15 @@ def generate_signed_urls(
                 
     # If URLs provided, extract object keys and generate presigned URLs
     elif urls:
+        # Fast path: all URLs point into the same bucket (the usual wardrobe listing)
+        if len(urls) > 1 and not content_types:
+            s3_infos = [extract_s3_object_key(url) for url in urls]
+            buckets = {info["bucket"] for info in s3_infos if info}
+            if all(s3_infos) and len(buckets) == 1:
+                batch_urls = _presign_batch(buckets.pop(), [info["key"] for info in s3_infos], client_method, expiration)
+                if batch_urls is not None:
+                    return batch_urls
+
         for i, url in enumerate(urls):
             s3_info = extract_s3_object_key(url)
             if not s3_info:
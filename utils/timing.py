@@ -0,0 +1,46 @@
+import os
+import time
+from contextlib import contextmanager
+
+import torch
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+LOG_STAGE_TIMINGS = os.getenv("LOG_STAGE_TIMINGS", "false").lower() in ("1", "true", "yes")
+
+
+class StageTimer:
+    """
+    Collects per-stage wall-clock timings for one inference call.
+
+    Does nothing unless LOG_STAGE_TIMINGS is set (or enabled=True), since accurate
+    GPU timings need a CUDA synchronize at every stage boundary.
+    """
+
+    def __init__(self, device: torch.device = None, enabled: bool = None):
+        self.enabled = LOG_STAGE_TIMINGS if enabled is None else enabled
+        self.sync = self.enabled and device is not None and device.type == "cuda"
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        if self.sync:
+            torch.cuda.synchronize()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.sync:
+                torch.cuda.synchronize()
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def report(self, label: str):
+        if self.enabled and self.timings:
+            stages = ", ".join(f"{name}={ms:.1f}ms" for name, ms in self.timings.items())
+            print(f"⏱️ {label} timings: {stages} (total={sum(self.timings.values()):.1f}ms)")